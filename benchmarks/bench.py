@@ -0,0 +1,235 @@
+# benchmarks/bench.py
+"""
+Benchmarks for the app script, the renderer and the stage payloads.
+
+Times full app.py reruns (via streamlit.testing.v1.AppTest) for every stage,
+for the Continue / Skip / Restart mission / Jump to finale paths and for the
+stage runner reporting that it moved on (`rerun/runner/advance`),
+microbenchmarks load_stage_template, inject and make_ics_data_uri, and
+records the HTML bytes each stage sends. Results are written as JSON and
+compared with a saved baseline:
+
+    python benchmarks/bench.py --save-baseline     # record benchmarks/baseline.json
+    python benchmarks/bench.py                     # compare; exit 1 on regression, 2 with no baseline
+
+A timing regresses when it is more than `--threshold` (default 25%) slower
+than the baseline and by at least a noise floor. App reruns compare medians
+with a floor of `--min-delta-ms` (default 1 ms). Renderer microbenchmarks
+take around 0.01 ms, where scheduler noise moves the median by as much, so
+they compare the best sample (`min_ms`) with a floor of
+`--micro-min-delta-ms` (default 0.05 ms). Payload sizes use the threshold
+alone.
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from streamlit.testing.v1 import AppTest
+
+from heist import content, vendor
+from heist.ics import build_ics, make_ics_data_uri
+from heist.images import picture_html
+from heist.render_cache import RENDER_CACHE, render_stage
+from heist.templates import clear_cache, inject, load_stage_template
+
+APP = ROOT / "app.py"
+RESULTS = ROOT / "benchmarks" / "results.json"
+BASELINE = ROOT / "benchmarks" / "baseline.json"
+
+BUTTONS = {
+    "continue": "I've finished this stage — Continue",
+    "skip": "Skip this stage",
+    "restart": "Restart mission",
+    "jump_to_finale": "Jump to finale",
+}
+
+
+def summarize(samples: list) -> dict:
+    samples = sorted(samples)
+    return {
+        "median_ms": statistics.median(samples) * 1000,
+        "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000,
+        "min_ms": samples[0] * 1000,
+        "n": len(samples),
+    }
+
+
+def timed(fn, repeat: int, setup=None) -> dict:
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return summarize(samples)
+
+
+# -----------------------
+# Full script reruns
+# -----------------------
+def new_app(runner: bool) -> AppTest:
+    at = AppTest.from_file(str(APP), default_timeout=60)
+    at.run()
+    if not runner:
+        at.sidebar.checkbox[0].uncheck().run()
+    return at
+
+
+def goto(at: AppTest, idx: int):
+    # same bookkeeping as goto_stage() in app.py
+    at.session_state["stage_idx"] = idx
+    at.session_state["runner_epoch"] = at.session_state["runner_epoch"] + 1
+    at.session_state["runner_start"] = idx
+
+
+def button(at: AppTest, label: str):
+    return next(b for b in at.button if b.label == label)
+
+
+def runner_advance(at: AppTest, idx: int):
+    # the value the runner sends with setComponentValue when it moves on to stage `idx`
+    at.session_state["stage_runner"] = {
+        "epoch": at.session_state["runner_epoch"], "stage_idx": idx, "completed": content.STAGES[:idx],
+    }
+    at.run()
+
+
+def bench_reruns(repeat: int) -> dict:
+    results = {}
+    for mode, runner in (("runner", True), ("classic", False)):
+        at = new_app(runner)
+        for idx, name in enumerate(content.STAGES):
+            goto(at, idx)
+            at.run()
+            results[f"rerun/{mode}/{name}"] = timed(at.run, repeat)
+        if runner:
+            # the default way between stages: vault -> puzzle, reported by the runner
+            results["rerun/runner/advance"] = timed(
+                lambda: runner_advance(at, 1), repeat,
+                setup=lambda: (goto(at, 0), at.run()),
+            )
+        # Continue / Skip start from the first stage, Restart / Jump from the stage before the finale
+        for key, label in BUTTONS.items():
+            if runner and key == "continue":
+                continue  # not shown while the runner moves between stages
+            start = 0 if key in ("continue", "skip") else 2
+            results[f"button/{mode}/{key}"] = timed(
+                lambda: button(at, label).click().run(), repeat,
+                setup=lambda: (goto(at, start), at.run()),
+            )
+        if at.exception:
+            raise RuntimeError(f"app.py raised during the benchmark: {at.exception}")
+    return results
+
+
+# -----------------------
+# Renderer microbenchmarks
+# -----------------------
+def default_mapping(name: str) -> dict:
+    dtstart = content.event_start(content.default_date())
+    mapping = content.stage_mapping(
+        content.DEFAULT_SENDER, content.DEFAULT_RECIPIENT, content.DEFAULT_ACCENT, dtstart,
+        character_img=picture_html("IDK.jpg", 120, "character"),
+    )
+    return {**mapping, **vendor.asset_mapping(name)}
+
+
+def bench_renderer(repeat: int) -> dict:
+    dtstart = content.event_start(content.default_date())
+    ics_args = (*content.event_details(content.DEFAULT_SENDER, content.DEFAULT_RECIPIENT), dtstart)
+    results = {}
+    for name in content.STAGES:
+        mapping = default_mapping(name)
+        results[f"load_stage_template/cold/{name}"] = timed(lambda: load_stage_template(name), repeat, setup=clear_cache)
+        results[f"load_stage_template/warm/{name}"] = timed(lambda: load_stage_template(name), repeat)
+        template = load_stage_template(name)
+        results[f"inject/{name}"] = timed(lambda: inject(template, mapping), repeat)
+        results[f"render_stage/cached/{name}"] = timed(lambda: render_stage(name, mapping), repeat)
+    results["make_ics_data_uri/cold"] = timed(
+        lambda: make_ics_data_uri(*ics_args), repeat,
+        setup=lambda: (make_ics_data_uri.cache_clear(), build_ics.cache_clear()),
+    )
+    results["make_ics_data_uri/warm"] = timed(lambda: make_ics_data_uri(*ics_args), repeat)
+    return results
+
+
+def payload_bytes() -> dict:
+    RENDER_CACHE.clear()
+    return {name: len(render_stage(name, default_mapping(name)).encode("utf-8")) for name in content.STAGES}
+
+
+# -----------------------
+# Baseline comparison
+# -----------------------
+def is_micro(key: str) -> bool:
+    return not key.startswith(("rerun/", "button/"))
+
+
+def regressions(results: dict, baseline: dict, threshold: float,
+                min_delta_ms: float = 1.0, micro_min_delta_ms: float = 0.05) -> list:
+    found = []
+    for key, now in results["timings"].items():
+        before = baseline.get("timings", {}).get(key)
+        if not before:
+            continue
+        stat, floor = ("min_ms", micro_min_delta_ms) if is_micro(key) else ("median_ms", min_delta_ms)
+        if now[stat] > before[stat] * (1 + threshold) and now[stat] - before[stat] >= floor:
+            found.append(f"{key}: {stat} {before[stat]:.3f} ms -> {now[stat]:.3f} ms")
+    for name, now in results["html_bytes"].items():
+        before = baseline.get("html_bytes", {}).get(name)
+        if before and now > before * (1 + threshold):
+            found.append(f"html_bytes/{name}: {before} -> {now}")
+    return found
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=20, help="samples per app rerun benchmark")
+    parser.add_argument("--micro-repeat", type=int, default=2000, help="samples per renderer microbenchmark")
+    parser.add_argument("--output", type=Path, default=RESULTS)
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown before failing (0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="ignore app rerun slowdowns smaller than this")
+    parser.add_argument("--micro-min-delta-ms", type=float, default=0.05,
+                        help="ignore renderer microbenchmark slowdowns smaller than this")
+    parser.add_argument("--save-baseline", action="store_true", help="write the results as the new baseline")
+    args = parser.parse_args(argv)
+
+    results = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "timings": {**bench_reruns(args.repeat), **bench_renderer(args.micro_repeat)},
+        "html_bytes": payload_bytes(),
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+    width = max(len(k) for k in results["timings"])
+    for key, t in results["timings"].items():
+        print(f"{key:<{width}}  median {t['median_ms']:8.3f} ms  p95 {t['p95_ms']:8.3f} ms")
+    for name, n in results["html_bytes"].items():
+        print(f"html_bytes/{name:<{width - 11}}  {n} B")
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"saved baseline to {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print(f"no baseline at {args.baseline}; run with --save-baseline first", file=sys.stderr)
+        return 2
+    found = regressions(results, json.loads(args.baseline.read_text(encoding="utf-8")), args.threshold,
+                        args.min_delta_ms, args.micro_min_delta_ms)
+    for line in found:
+        print(f"REGRESSION {line}", file=sys.stderr)
+    return 1 if found else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
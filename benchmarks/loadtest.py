@@ -0,0 +1,237 @@
+# benchmarks/loadtest.py
+"""
+Concurrent-session load harness.
+
+Starts app.py under a real `streamlit run` server and simulates N
+concurrent sessions with a small stand-in websocket client (the same
+BackMsg/ForwardMsg protocol the browser speaks). Each session walks the
+stage flow with randomized think times: load, sometimes edit the recipient,
+complete every stage (reported the way the stage runner reports it),
+Restart. For each N it reports rerun latency
+percentiles, reruns/sec and the server's RSS growth per session, then
+disconnects everyone and reports how much memory the server kept, which
+points at session_state or render buffers that leak.
+
+    python benchmarks/loadtest.py --sessions 1,5,10,25 --think 0.2
+
+AppTest can't be used here: each AppTest run sets up and tears down a
+process-global runtime, so concurrent instances break each other.
+
+Needs the `websockets` package for the client. It isn't in
+requirements.txt because only this harness uses it; recent Streamlit
+releases happen to install it, otherwise `pip install websockets`.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+ROOT = Path(__file__).resolve().parent.parent
+APP = ROOT / "app.py"
+RESTART = "Restart mission"
+RECIPIENT = "Recipient name"
+STAGE_COUNT = 4
+
+
+# -----------------------
+# Server under test
+# -----------------------
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int) -> subprocess.Popen:
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", str(APP),
+         "--server.headless", "true", "--server.port", str(port),
+         "--browser.gatherUsageStats", "false",
+         # release disconnected sessions right away so retained memory is measurable
+         "--server.disconnectedSessionTTL", "0"],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1)
+            return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("streamlit server did not come up")
+
+
+def rss_bytes(pid: int):
+    """Resident set size of `pid`, or None where /proc isn't available."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return None
+
+
+def percentile(sorted_samples: list, q: float) -> float:
+    return sorted_samples[min(len(sorted_samples) - 1, int(len(sorted_samples) * q))]
+
+
+# -----------------------
+# Stand-in browser session
+# -----------------------
+class Session:
+    def __init__(self, n: int, url: str, think: float, rng: random.Random):
+        self.n = n
+        self.url = url
+        self.think = think
+        self.rng = rng
+        self.latencies = []
+        self.widgets = {}  # label -> widget id, from the last rerun
+        self.values = {}   # widget id -> text value we keep sending, like the browser does
+        self.runner = None  # (widget id, args) of the stage runner component
+        self.ws = None
+
+    async def pause(self):
+        if self.think:
+            await asyncio.sleep(self.rng.expovariate(1 / self.think))
+
+    async def rerun(self, trigger: str = None):
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        for wid, value in self.values.items():
+            state = msg.rerun_script.widget_states.widgets.add()
+            state.id = wid
+            if isinstance(value, dict):
+                state.json_value = json.dumps(value)
+            else:
+                state.string_value = value
+        if trigger:
+            state = msg.rerun_script.widget_states.widgets.add()
+            state.id = self.widgets[trigger]
+            state.trigger_value = True
+        t0 = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        # a button that calls st.rerun() finishes early once, then runs again
+        while True:
+            fwd = ForwardMsg()
+            fwd.ParseFromString(await self.ws.recv())
+            kind = fwd.WhichOneof("type")
+            if kind == "delta" and fwd.delta.WhichOneof("type") == "new_element":
+                element = fwd.delta.new_element
+                field = element.WhichOneof("type")
+                if field == "exception":
+                    raise RuntimeError(f"session {self.n}: {element.exception.message}")
+                proto = getattr(element, field)
+                if field == "component_instance":
+                    self.runner = (proto.id, json.loads(proto.json_args))
+                    continue
+                label = getattr(proto, "label", "")
+                if label and getattr(proto, "id", ""):
+                    self.widgets[label] = proto.id
+            elif kind == "script_finished" and fwd.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                break
+        self.latencies.append(time.perf_counter() - t0)
+
+    async def walk(self, finished: asyncio.Event, release: asyncio.Event):
+        async with websockets.connect(self.url, subprotocols=["streamlit"], max_size=None) as ws:
+            self.ws = ws
+            await self.rerun()
+            await self.pause()
+            # most sessions keep the defaults; some personalize the recipient
+            if self.rng.random() < 0.3:
+                self.values[self.widgets[RECIPIENT]] = f"Recipient {self.n}"
+                await self.rerun()
+                await self.pause()
+            # what the runner sends when a stage completes and it moves on
+            for idx in range(1, STAGE_COUNT):
+                wid, args = self.runner
+                self.values[wid] = {"epoch": args["epoch"], "stage_idx": idx, "completed": args["stages"][:idx]}
+                await self.rerun()
+                await self.pause()
+            await self.rerun(RESTART)
+            # stay connected until every session is done, so RSS covers all of them
+            finished.set()
+            await release.wait()
+
+
+async def run_level(n: int, port: int, pid: int, think: float, seed: int) -> dict:
+    url = f"ws://127.0.0.1:{port}/_stcore/stream"
+    rss_before = rss_bytes(pid)
+    release = asyncio.Event()
+    sessions = [Session(i, url, think, random.Random(seed + i)) for i in range(n)]
+    started = time.perf_counter()
+    finished = [asyncio.Event() for _ in sessions]
+    tasks = [asyncio.create_task(s.walk(ev, release)) for s, ev in zip(sessions, finished)]
+    while not all(ev.is_set() for ev in finished):
+        failed = [t for t in tasks if t.done() and t.exception()]
+        if failed:
+            raise failed[0].exception()
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - started
+    rss_loaded = rss_bytes(pid)
+    release.set()
+    await asyncio.gather(*tasks)
+    # give the server a moment to drop the disconnected sessions
+    await asyncio.sleep(2)
+    rss_after = rss_bytes(pid)
+
+    latencies = sorted(ms for s in sessions for ms in s.latencies)
+    result = {
+        "sessions": n,
+        "reruns": len(latencies),
+        "elapsed_s": round(elapsed, 3),
+        "reruns_per_s": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2),
+        "rss_per_session_kb": None,
+        "rss_retained_kb": None,
+    }
+    if rss_before is not None:
+        result["rss_per_session_kb"] = round((rss_loaded - rss_before) / n / 1024, 1)
+        result["rss_retained_kb"] = round((rss_after - rss_before) / 1024, 1)
+    return result
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sessions", default="1,5,10,25", help="comma-separated concurrency levels")
+    parser.add_argument("--think", type=float, default=0.2, help="mean think time between interactions, in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=None, help="also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    port = free_port()
+    server = start_server(port)
+    results = []
+    try:
+        # warm the server (imports, template compile, image variants) before measuring
+        asyncio.run(run_level(1, port, server.pid, 0, args.seed))
+        print(f"{'N':>4} {'reruns':>7} {'rerun/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'KB/session':>11} {'retained KB':>12}")
+        for n in (int(x) for x in args.sessions.split(",")):
+            r = asyncio.run(run_level(n, port, server.pid, args.think, args.seed))
+            results.append(r)
+            print(f"{r['sessions']:>4} {r['reruns']:>7} {r['reruns_per_s']:>8} {r['p50_ms']:>8} {r['p95_ms']:>8} "
+                  f"{r['p99_ms']:>8} {r['rss_per_session_kb']!s:>11} {r['rss_retained_kb']!s:>12}")
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,3 @@
+"""
+Helpers for the Heart Heist app that don't need a running Streamlit session.
+"""
@@ -0,0 +1,60 @@
+# heist/content.py
+"""
+What gets injected into the stage templates.
+
+Shared by app.py and the headless exporter so both render the same pages
+from the same (sender, recipient, accent, date) inputs.
+"""
+import datetime
+import json
+
+STAGES = ["vault", "puzzle", "rain", "finale"]
+
+DEFAULT_SENDER = "Parth"
+DEFAULT_RECIPIENT = "Sneha"
+DEFAULT_ACCENT = "#ff6b8a"
+
+POEM_LINE = "In a world of noise, you are my favourite melody."
+COMPLIMENTS = [
+    "Your Maturity..",
+    "Your Optimism",
+    "Your Affection!",
+    "Your Delulu😠",
+    "Everything😼",
+    "Marie Curie👉👈",
+    "Possessive😦"
+]
+AUDIO_URL = "https://cdn.simplecast.com/audio/6a2bbd/lofi-chill-beats.mp3"
+
+POEM_WORDS_JSON = json.dumps(POEM_LINE.split())
+COMPLIMENTS_JSON = json.dumps(COMPLIMENTS)
+
+
+def default_date() -> datetime.date:
+    return datetime.date(datetime.datetime.now().year, 2, 14)
+
+
+def event_start(date_choice: datetime.date) -> datetime.datetime:
+    return datetime.datetime.combine(date_choice, datetime.time(hour=19, minute=0))
+
+
+def event_details(sender: str, recipient: str) -> tuple:
+    """(title, description) of the calendar invite."""
+    return (
+        f"Valentine!!(Or whatever it is😭) {recipient}",
+        f"Valentine!!(Or whatever it is😭) with {recipient} — sent by {sender}.",
+    )
+
+
+def stage_mapping(sender, recipient, accent, dtstart, ics_uri="", character_img="") -> dict:
+    return {
+        "{{SENDER}}": sender,
+        "{{RECIPIENT}}": recipient,
+        "{{ACCENT}}": accent,
+        "{{AUDIO_URL}}": AUDIO_URL,
+        "{{POEM_WORDS_JSON}}": POEM_WORDS_JSON,
+        "{{COMPLIMENTS_JSON}}": COMPLIMENTS_JSON,
+        "{{ICS_URI}}": ics_uri,
+        "{{DATE_HUMAN}}": dtstart.strftime("%A, %B %d, %Y at %I:%M %p"),
+        "{{CHARACTER_IMG}}": character_img,
+    }
@@ -0,0 +1,341 @@
+# heist/defaults.py
+"""
+Default stage templates, written to `stages/` only when a file is missing.
+
+Imported lazily by `heist.bootstrap`, so these literals are not rebuilt on
+every rerun of app.py. These are simplified but fully functional versions
+of the stages.
+"""
+
+DEFAULT_VAULT = r"""<!doctype html>
+<html><head><meta charset="utf-8"/><meta name="viewport" content="width=device-width,initial-scale=1"/>
+<title>Vault — The Heart Heist</title>{{PREFETCH_NEXT}}
+<style>
+:root{--accent:{{ACCENT}};--bg:#071024}
+html,body{height:100%;margin:0;background:linear-gradient(180deg,var(--bg),#02101a);font-family:Inter,Arial;color:#fff;display:flex;align-items:center;justify-content:center}
+.container{width:100%;max-width:960px;padding:28px;box-sizing:border-box;text-align:center}
+.spot{width:320px;height:320px;margin:0 auto;border-radius:50%;background:radial-gradient(circle at 40% 30%, rgba(255,182,193,0.22), rgba(255,182,193,0.06));display:flex;align-items:center;justify-content:center}
+.pad{width:160px;height:160px;border-radius:18px;background:linear-gradient(180deg,rgba(255,240,245,0.06),rgba(255,240,245,0.02));display:flex;align-items:center;justify-content:center;flex-direction:column}
+.icon{font-size:56px;color:var(--accent)}
+.title{margin-top:12px;font-weight:700;color:#ffd6e0}
+.scanner{margin:18px auto 6px;width:260px;height:44px;border-radius:999px;background:rgba(255,255,255,0.02);position:relative;overflow:hidden;border:1px solid rgba(255,255,255,0.03);cursor:pointer}
+.fill{position:absolute;left:0;top:0;bottom:0;width:0%;background:linear-gradient(90deg,var(--accent),#ffd6e0);height:100%;transition:width 0.06s linear}
+.hint{position:relative;z-index:2;padding:10px;color:#fff;font-weight:700}
+.log{height:44px;color:#dbeffd;margin-top:8px;min-height:40px}
+.helper{margin-top:10px;color:#cfe8ff;opacity:0.9}
+</style>
+</head>
+<body>
+  <div class="container" role="main">
+    <div class="spot"><div class="pad"><div class="icon">🔒</div><div style="font-size:13px;color:#fff;margin-top:6px">Access Restricted</div><div style="font-size:12px;color:#ffd6e0;margin-top:4px">Authorized Sneha Only 😠</div></div></div>
+    <div class="scanner" id="scanner" title="Press & hold to scan"><div class="fill" id="fill"></div><div class="hint" id="hint">Press & hold to scan</div></div>
+    <div class="log" id="log"></div>
+    <div class="helper">Hold on the scanner for a second — it's a secret handshake.</div>
+  </div>
+
+<script>
+const scanner = document.getElementById('scanner'), fill = document.getElementById('fill'), log = document.getElementById('log'), hint = document.getElementById('hint');
+let holding=false, progress=0, timer=null;
+// hosted by a stage runner that advances on its own (no main-page Continue button to press)
+function inRunner(){ try{ return !!(window.frameElement && window.frameElement.dataset.runner); }catch(e){ return false; } }
+function startHold(){ if(holding) return; holding=true; progress=0; fill.style.width='0%'; log.textContent='Analyzing smile...'; timer=setInterval(()=>{
+  if(!holding) return; progress=Math.min(100, progress+3); fill.style.width = progress + '%';
+  if(progress===30) log.textContent='Analyzing vibes... Immaculate.';
+  if(progress===60) log.textContent='Analyzing smile... 100% Contagious.';
+  if(progress===92) log.textContent='Match found: The girl of my dreams.';
+  if(progress>=100){ clearInterval(timer); holding=false; onUnlock(); }
+}, 50);}
+function cancelHold(){ holding=false; clearInterval(timer); fill.style.width='0%'; log.textContent=''; hint.textContent='Press & hold to scan'; }
+function onUnlock(){
+  try{ new Audio('data:audio/wav;base64,UklGRiQAAABXQVZFZm10IBAAAAABAAEAQB8AAIA+AAACABAAZGF0YQAAAAA=').play(); }catch(e){}
+  document.body.style.transition='background 450ms'; document.body.style.background='linear-gradient(180deg,#ffd6e0,#fff0f4)';
+  log.textContent = inRunner() ? "Vault unlocked. On to the next stage..." : "Vault unlocked. Press 'I've finished this stage — Continue' in the main page.";
+  hint.textContent = "Unlocked ✔";
+  document.querySelector('.icon').textContent = '💗';
+  try{ parent.postMessage({heist:'stage-complete', stage:'vault'}, '*'); }catch(e){}
+}
+scanner.addEventListener('pointerdown',(e)=>{ e.preventDefault(); startHold(); });
+scanner.addEventListener('pointerup',(e)=>{ cancelHold(); });
+scanner.addEventListener('pointerleave',(e)=>{ cancelHold(); });
+scanner.addEventListener('touchstart',(e)=>{ startHold(); }, {passive:true});
+scanner.addEventListener('touchend',(e)=>{ cancelHold(); }, {passive:true});
+</script>
+</body></html>
+"""
+
+DEFAULT_PUZZLE = r"""<!doctype html>
+<html><head><meta charset="utf-8"/><meta name="viewport" content="width=device-width,initial-scale=1"/><title>Poetry Puzzle</title>{{PREFETCH_NEXT}}
+<style>
+:root{--accent:{{ACCENT}};--bg:#071024}
+html,body{height:100%;margin:0;background:linear-gradient(180deg,var(--bg),#051022);font-family:Inter,Arial;color:#fff;display:flex;align-items:center;justify-content:center}
+.wrap{width:100%;max-width:1000px;padding:22px}
+.card{background:linear-gradient(180deg, rgba(255,255,255,0.02), rgba(255,255,255,0.01));border-radius:14px;padding:18px;box-shadow:0 20px 60px rgba(0,0,0,0.6)}
+.words{display:flex;gap:10px;flex-wrap:wrap}
+.word{padding:8px 12px;background:rgba(255,255,255,0.02);border-radius:10px;cursor:grab}
+.notepad{width:320px;min-height:120px;border:2px dashed rgba(255,255,255,0.03);border-radius:10px;padding:12px;background:rgba(0,0,0,0.06)}
+.continue button{padding:10px 14px;border-radius:12px;background:linear-gradient(90deg,var(--accent),#ffd6e0);border:none;color:#071024;font-weight:800}
+.good{box-shadow:0 0 30px rgba(255,200,215,0.35)}
+</style></head><body>
+<div class="wrap">
+  <div class="card">
+    <div style="display:flex;justify-content:space-between"><div style="font-weight:800;color:#ffd6e0">Poetry Puzzle</div><div style="color:#cfe8ff">Drag or tap the words into the notepad</div></div>
+    <div style="display:flex;gap:18px;margin-top:12px">
+      <div class="words" id="wordsArea"></div>
+      <div style="width:340px"><div class="notepad" id="notepad" ondragover="event.preventDefault()"></div><div class="continue" style="text-align:right;margin-top:12px"><button id="continueBtn" disabled>Continue</button></div></div>
+    </div>
+  </div>
+</div>
+
+<script>
+const WORDS = {{POEM_WORDS_JSON}};
+const wordsArea = document.getElementById('wordsArea'), notepad = document.getElementById('notepad'), continueBtn=document.getElementById('continueBtn');
+function shuffle(a){ for(let i=a.length-1;i>0;i--){ const j=Math.floor(Math.random()*(i+1)); [a[i],a[j]]=[a[j],a[i]] } return a }
+let shuffled = shuffle([...WORDS]);
+function render(){ wordsArea.innerHTML=''; shuffled.forEach(w=>{ const el=document.createElement('div'); el.className='word'; el.textContent=w; el.draggable=true;
+    el.addEventListener('dragstart',e=>{ e.dataTransfer.setData('text/plain',w); el.classList.add('dragging')});
+    el.addEventListener('dragend',()=>el.classList.remove('dragging'));
+    el.addEventListener('click', ()=> placeToken(w, el));
+    wordsArea.appendChild(el);
+  })}
+function placeToken(word, sourceEl){ const token=document.createElement('div'); token.className='word'; token.textContent=word; token.draggable=true; token.addEventListener('dragstart',e=>e.dataTransfer.setData('text/plain',word));
+  try{ sourceEl.remove(); }catch(e){} notepad.appendChild(token); checkSolved(); }
+notepad.addEventListener('dragover', e=>e.preventDefault());
+notepad.addEventListener('drop', e=>{ e.preventDefault(); const w=e.dataTransfer.getData('text/plain'); if(!w) return; const children=Array.from(wordsArea.children); const found=children.find(c=>c.textContent===w); if(found) found.remove(); const token=document.createElement('div'); token.className='word'; token.textContent=w; token.draggable=true; token.addEventListener('dragstart',e=>e.dataTransfer.setData('text/plain',w)); notepad.appendChild(token); checkSolved();});
+function checkSolved(){ const placed=Array.from(notepad.children).map(x=>x.textContent.trim()); const target=WORDS.map(s=>s.trim()); if(placed.length!==target.length){ continueBtn.disabled=true; notepad.classList.remove('good'); return; } let ok=true; for(let i=0;i<target.length;i++){ if(target[i]!==placed[i]){ ok=false; break } } if(ok){ notepad.classList.add('good'); continueBtn.disabled=false; } else { notepad.classList.remove('good'); continueBtn.disabled=true; } }
+// hosted by a stage runner that advances on its own (no main-page Continue button to press)
+function inRunner(){ try{ return !!(window.frameElement && window.frameElement.dataset.runner); }catch(e){ return false; } }
+continueBtn.addEventListener('click', ()=> { continueBtn.textContent = inRunner() ? "Good — on to the next stage..." : "Good — now press Continue in the main page"; continueBtn.disabled = true; try{ parent.postMessage({heist:'stage-complete', stage:'puzzle'}, '*'); }catch(e){} });
+render();
+</script>
+</body></html>
+"""
+
+DEFAULT_RAIN = r"""<!doctype html>
+<html><head><meta charset="utf-8"/><meta name="viewport" content="width=device-width,initial-scale=1"/><title>Compliment Rain</title>{{PREFETCH_NEXT}}
+<style>
+:root{--accent:{{ACCENT}};--bg:#071024}
+html,body{height:100%;margin:0;background:linear-gradient(180deg,#0d1a2b,#071024);font-family:Inter,Arial;color:#fff;overflow:hidden}
+.stage{width:95vw;height:85vh;background:linear-gradient(180deg,#fff3fb06,transparent);border-radius:14px;padding:10px;position:relative;overflow:hidden;margin:auto}
+.reason-list{position:absolute;top:12px;left:12px;background:rgba(7,16,36,0.6);padding:10px;border-radius:8px;max-width:260px}
+.reason-list div{padding:6px 8px;border-radius:6px;background:rgba(255,255,255,0.02);margin-bottom:6px}
+.character{position:absolute;bottom:12px;left:0;width:120px;text-align:center;z-index:30;will-change:transform}
+.character img{width:120px;height:120px;border-radius:999px;border:6px solid rgba(255,255,255,0.04)}
+#rain{position:absolute;left:0;top:0;width:100%;height:100%;pointer-events:none;z-index:20}
+.hint{position:absolute;right:12px;top:12px;color:#cfe8ff}
+.fps{position:absolute;right:12px;top:36px;font:11px/1.4 monospace;color:#9fbfff;opacity:0.7;z-index:40;cursor:pointer;user-select:none}
+.fps.stress{color:#ffd6e0}
+</style></head><body>
+<div class="stage" id="stage">
+  <div class="reason-list" id="reasons"><strong>Reasons I like you</strong></div>
+  <canvas id="rain"></canvas>
+  <div class="hint">Catch 5 stars to proceed</div>
+  <div class="fps" id="fps" title="Double-click for a 50+ item stress test"></div>
+  <div class="character" id="character">{{CHARACTER_IMG}}<div style="font-size:12px;margin-top:6px;color:#fff">Move me to catch stars</div></div>
+</div>
+<script>
+const compliments = {{COMPLIMENTS_JSON}}; // injected
+const stage = document.getElementById('stage');
+const character = document.getElementById('character');
+const reasons = document.getElementById('reasons');
+const canvas = document.getElementById('rain');
+const fpsEl = document.getElementById('fps');
+const ctx = canvas.getContext('2d');
+
+const TYPES = ['💖','🌟','🌸','✨'];
+const POOL_SIZE = 96;
+const required = 5;
+let caught = 0;
+let active = true;
+let stress = false;
+// hosted by a stage runner that advances on its own (no main-page Continue button to press)
+function inRunner(){ try{ return !!(window.frameElement && window.frameElement.dataset.runner); }catch(e){ return false; } }
+
+// fixed object pool: items are recycled, never allocated during play
+const pool = [];
+for(let i=0;i<POOL_SIZE;i++) pool.push({live:false, x:0, y:0, speed:0, type:''});
+let live = 0;
+
+// geometry is cached here and only re-measured on resize, never per frame
+let W = 0, H = 0, stageLeft = 0, charX = 0, charW = 120, charTop = 0, charBottom = 0;
+
+function measure(){
+  const r = stage.getBoundingClientRect();
+  const c = character.getBoundingClientRect();
+  const dpr = window.devicePixelRatio || 1;
+  stageLeft = r.left; W = stage.clientWidth; H = stage.clientHeight;
+  canvas.width = Math.round(W*dpr); canvas.height = Math.round(H*dpr);
+  ctx.setTransform(dpr,0,0,dpr,0,0);
+  ctx.font = '26px serif'; ctx.textAlign = 'center'; ctx.textBaseline = 'middle';
+  charW = c.width; charTop = c.top - r.top; charBottom = c.bottom - r.top;
+  placeChar(charX || W/2);
+}
+
+function placeChar(x){
+  charX = Math.max(20, Math.min(x, W - 20));
+  character.style.transform = 'translateX(' + (charX - charW/2) + 'px)';
+}
+
+function spawn(){
+  let item = null;
+  for(let i=0;i<POOL_SIZE;i++){ if(!pool[i].live){ item = pool[i]; break; } }
+  if(!item) return;
+  const duration = 3.5 + Math.random()*2.5;  // seconds to cross the stage
+  item.live = true;
+  item.type = TYPES[Math.floor(Math.random()*TYPES.length)];
+  item.x = (0.05 + Math.random()*0.85) * W;
+  item.y = -0.06 * H;
+  item.speed = H / duration;
+  live++;
+}
+
+function catchItem(symbol){
+  if(symbol === '🌟'){
+    const node = document.createElement('div');
+    node.textContent = `Caught Star #${caught+1}: ${compliments[Math.min(caught,compliments.length-1)]}`;
+    reasons.appendChild(node);
+    caught += 1;
+    if(caught >= required){
+      active = false;
+      for(let i=0;i<POOL_SIZE;i++) pool[i].live = false;
+      live = 0;
+      // the runner moves on by itself; otherwise point at the main page's Continue button
+      const hint = document.createElement('div');
+      hint.textContent = inRunner() ? "Great! On to the finale..." : "Great! Press Continue in the main page.";
+      hint.style.marginTop = '8px'; hint.style.color = '#ffd6e0';
+      reasons.appendChild(hint);
+      // tell the stage runner (if any) that this stage is done
+      try{ parent.postMessage({heist:'stage-complete', stage:'rain'}, '*'); }catch(e){}
+    }
+  } else {
+    const node = document.createElement('div'); node.textContent = symbol;
+    reasons.appendChild(node);
+    if(reasons.children.length > 8) reasons.removeChild(reasons.children[1]);
+  }
+}
+
+// one shared loop; movement is scaled by the frame's dt so speed doesn't depend on frame rate
+let last = performance.now(), nextSpawn = 0;
+let frames = 0, frameTimeSum = 0, worstFrame = 0, statsSince = last;
+
+function frame(now){
+  const ms = now - last; last = now;
+  const dt = Math.min(ms, 100) / 1000;
+
+  if(active){
+    nextSpawn -= dt;
+    while(nextSpawn <= 0){
+      spawn();
+      // stress mode keeps 50+ items on screen for the FPS check
+      nextSpawn += stress ? 0.05 : 0.6 + Math.random()*0.6;
+    }
+  }
+
+  ctx.clearRect(0, 0, W, H);
+  const half = charW / 2;
+  for(let i=0;i<POOL_SIZE;i++){
+    const it = pool[i];
+    if(!it.live) continue;
+    it.y += it.speed * dt;
+    if(it.y >= H){ it.live = false; live--; continue; }
+    if(it.x > charX - half && it.x < charX + half && it.y > charTop && it.y < charBottom){
+      it.live = false; live--;
+      catchItem(it.type);
+      if(!active) break;
+      continue;
+    }
+    ctx.fillText(it.type, it.x, it.y);
+  }
+
+  frames++; frameTimeSum += ms; if(ms > worstFrame) worstFrame = ms;
+  if(now - statsSince >= 500){
+    fpsEl.textContent = `${Math.round(frames*1000/(now - statsSince))} fps · ${(frameTimeSum/frames).toFixed(1)} ms avg · ${worstFrame.toFixed(1)} ms worst · ${live} items`;
+    frames = 0; frameTimeSum = 0; worstFrame = 0; statsSince = now;
+  }
+  // stage finished and the last items have fallen off: stop instead of redrawing an empty canvas
+  if(!active && live === 0){ fpsEl.textContent = ''; return; }
+  requestAnimationFrame(frame);
+}
+
+// pointer movement to move character (uses the cached stage offset, no layout reads)
+document.addEventListener('pointermove', (e)=> placeChar(e.clientX - stageLeft));
+document.addEventListener('touchmove', (e)=> { if(e.touches && e.touches[0]) placeChar(e.touches[0].clientX - stageLeft); }, {passive:true});
+fpsEl.addEventListener('dblclick', ()=>{ stress = !stress; fpsEl.classList.toggle('stress', stress); });
+window.addEventListener('resize', measure);
+const img = character.querySelector('img');
+if(img && !img.complete) img.addEventListener('load', measure);
+
+measure();
+function start(){ last = statsSince = performance.now(); requestAnimationFrame(frame); }
+// preloaded by the stage runner while the previous stage plays: start when it is shown
+let preloaded = false;
+try{ preloaded = !!(window.frameElement && window.frameElement.dataset.preload); }catch(e){}
+if(preloaded){
+  window.addEventListener('message', function onShow(e){
+    if(!e.data || e.data.heist !== 'show') return;
+    window.removeEventListener('message', onShow);
+    measure(); start();
+  });
+  // tell the runner we're listening; it sends 'show' only after this
+  try{ parent.postMessage({heist:'ready', stage:'rain'}, '*'); }catch(e){}
+} else {
+  start();
+}
+</script>
+</body></html>
+"""
+
+DEFAULT_FINALE = r"""<!doctype html>
+<html><head><meta charset="utf-8"/><meta name="viewport" content="width=device-width,initial-scale=1"/><title>Finale</title>{{PREFETCH_NEXT}}
+<script src="{{CONFETTI_JS}}" defer></script>
+<style>
+:root{--accent:{{ACCENT}};--bg:#071024}
+html,body{height:100%;margin:0;background:linear-gradient(180deg,#071024,#02101a);font-family:Inter,Arial;color:#fff;display:flex;align-items:center;justify-content:center}
+.wrap{width:100%;max-width:900px;padding:18px;text-align:center}
+.envelope{width:420px;height:260px;border-radius:12px;background:linear-gradient(180deg,#ffdfe6,#ffd6e0);display:flex;align-items:center;justify-content:center;position:relative;cursor:pointer;box-shadow:0 30px 80px rgba(0,0,0,0.6)}
+.card{position:absolute;top:100%;left:50%;transform:translate(-50%,0);width:360px;height:200px;background:white;border-radius:10px;padding:18px;color:#071024;display:flex;flex-direction:column;justify-content:center;align-items:center;transition:top 500ms}
+.card.show{top:18%}
+.bigq{font-weight:800;margin-top:8px;color:var(--accent);display:none}
+.btns{display:flex;gap:14px;margin-top:12px}
+.yes{padding:12px 20px;border-radius:12px;background:linear-gradient(90deg,#ff6b8a,#ffb2c6);color:#071024;border:none;font-weight:800;cursor:pointer}
+.no{padding:8px 12px;border-radius:10px;background:rgba(255,255,255,0.02);border:1px solid rgba(255,255,255,0.03);cursor:pointer}
+.ticket{position:fixed;bottom:-160px;left:50%;transform:translateX(-50%);width:560px;background:linear-gradient(90deg,#ffffff,#ffd6e0);border-radius:12px;padding:18px;color:#071024;box-shadow:0 40px 120px rgba(0,0,0,0.6);transition:bottom 700ms}
+.ticket.show{bottom:30px}
+</style></head><body>
+<div class="wrap">
+  <div class="envelope" id="envelope">
+    <div style="font-size:32px">💌</div>
+    <div style="position:absolute;bottom:8px;right:10px;color:#071024;font-size:12px">Tap to open</div>
+    <div class="card" id="cardInside">
+      <div style="font-family:'Brush Script MT',cursive;font-size:20px;color:#333">I have a very important question...</div>
+      <div class="bigq" id="bigq">Will you be my Valentine?</div>
+      <div class="btns" id="btns" style="display:none">
+        <button class="yes" id="yes">YES! Absolutely! ❤️</button>
+        <button class="no" id="no">No.</button>
+      </div>
+    </div>
+  </div>
+</div>
+<div class="ticket" id="ticket"><div style="display:flex;justify-content:space-between;align-items:center">
+  <div><div style="font-weight:900">ADMIT ONE</div><div style="font-size:20px;font-weight:800;margin-top:6px">Valentine!!(Or whatever it is😭)</div><div style="margin-top:6px">With: <strong>{{RECIPIENT}}</strong></div><div style="margin-top:6px">When: <strong>{Whenever you want👉👈}</strong></div></div>
+  <div style="text-align:right"><div style="font-size:12px;color:#555">Dress code</div><div style="font-weight:700;margin-top:6px">Lookin' gorgeous as always</div></div>
+</div><div style="margin-top:12px;display:flex;gap:12px;justify-content:flex-end"><a id="downloadIcs" href="{{ICS_URI}}" download="valentine_{{RECIPIENT}}.ics" style="padding:8px 12px;border-radius:8px;background:rgba(7,16,36,0.85);color:#fff;text-decoration:none">Save to Calendar</a></div></div>
+
+<script>
+const envelope=document.getElementById('envelope'), card=document.getElementById('cardInside'), bigq=document.getElementById('bigq'), btns=document.getElementById('btns'), yes=document.getElementById('yes'), no=document.getElementById('no'), ticket=document.getElementById('ticket');
+envelope.addEventListener('click', ()=>{ card.classList.add('show'); setTimeout(()=>{ bigq.style.display='block'; setTimeout(()=>{ btns.style.display='flex'; },400); },430); });
+let dodge=0, dodging=false;
+function dodgeNo(e){ if(dodging) return; dodging=true; dodge++; const env=envelope.getBoundingClientRect(); const x=Math.random()*(env.width-80)+env.left+window.scrollX; const y=Math.random()*(env.height-40)+env.top+window.scrollY; no.style.position='absolute'; no.style.left=(x-env.left)+'px'; no.style.top=(y-env.top)+'px'; setTimeout(()=>{ dodging=false; },220); if(dodge>=4){ no.textContent='YES!'; no.className='yes'; no.onclick=accept; } }
+no.addEventListener('mouseenter', dodgeNo); no.addEventListener('touchstart', dodgeNo);
+function accept(){ try{ if(window.confetti) window.confetti({ particleCount: 120, spread: 160, origin: { x: 0.5, y: 0.2 } }); }catch(e){} ticket.classList.add('show'); try{ parent.postMessage({heist:'stage-complete', stage:'finale'}, '*'); }catch(e){} }
+yes.addEventListener('click', accept);
+const ics=document.getElementById('downloadIcs'); if(!ics.getAttribute('href')){ ics.removeAttribute('download'); ics.textContent='Save to Calendar below 👇'; ics.style.pointerEvents='none'; }
+</script>
+</body></html>
+"""
+
+STAGE_DEFAULTS = {
+    "vault.html": DEFAULT_VAULT,
+    "puzzle.html": DEFAULT_PUZZLE,
+    "rain.html": DEFAULT_RAIN,
+    "finale.html": DEFAULT_FINALE,
+}
@@ -0,0 +1,242 @@
+# heist/export.py
+"""
+Headless batch export: pre-render heists for many recipients at once.
+
+Reads (sender, recipient, accent, date) rows from a CSV or JSONL file and
+writes one self-contained static bundle per row: the four stages, the .ics
+invite and an index.html that plays them in order. Bundles also carry their
+own copy of the vendored assets, so they play offline. Rendering goes through
+the same templates/inject path as app.py, spread across a process pool.
+Rows are streamed in bounded batches, so large files never sit in memory.
+
+    python -m heist.export rows.csv -o dist/ -j 8
+
+Importable without starting Streamlit.
+"""
+import argparse
+import concurrent.futures as cf
+import csv
+import datetime
+import json
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+from heist import content, vendor
+from heist.ics import build_ics
+from heist.images import picture_html
+from heist.templates import STAGES_DIR, inject, load_stage_template
+
+MAX_REPORTED = 50  # bad rows listed individually at the end of a run
+
+# plays the stages in order, advancing when a stage posts {heist: 'stage-complete'};
+# the next stage is prefetched while the current one is played
+INDEX_HTML = """<!doctype html>
+<html><head><meta charset="utf-8"><meta name="viewport" content="width=device-width,initial-scale=1">
+<title>The Heart Heist</title>
+<style>html,body{margin:0;height:100%;background:#071024}iframe{width:100%;height:100%;border:0;display:block}</style>
+</head><body>
+<iframe id="stage" src="STAGE_FILES_0" data-runner="1"></iframe>
+<script>
+const STAGES = STAGE_FILES_JSON, frame = document.getElementById('stage');
+let i = 0;
+function prefetchNext(){
+  if(i >= STAGES.length - 1) return;
+  const l = document.createElement('link'); l.rel = 'prefetch'; l.href = STAGES[i + 1];
+  document.head.appendChild(l);
+}
+frame.addEventListener('load', prefetchNext);
+window.addEventListener('message', (e)=>{
+  if(!e.data || e.data.heist !== 'stage-complete' || e.source !== frame.contentWindow) return;
+  if(i < STAGES.length - 1) setTimeout(()=>{ frame.src = STAGES[++i]; }, 900);
+});
+</script>
+</body></html>
+"""
+
+
+# -----------------------
+# Input rows
+# -----------------------
+def read_rows(path: Path):
+    """Yield row dicts from a .csv or .jsonl file, one at a time.
+
+    A JSONL line that doesn't parse is yielded as None, so it is reported as
+    a bad row instead of ending the export.
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.suffix.lower() in (".jsonl", ".ndjson"):
+            for line in f:
+                line = line.strip()
+                if line:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        yield None
+        else:
+            yield from csv.DictReader(f)
+
+
+def normalize_row(row: dict) -> tuple:
+    """(sender, recipient, accent, date) with defaults filled in; ValueError for a bad row."""
+    if not isinstance(row, dict):
+        raise ValueError("not a JSON object")
+    for field in ("sender", "recipient", "accent"):
+        value = row.get(field)
+        if value is not None and not isinstance(value, str):
+            raise ValueError(f"{field} must be a string, got {type(value).__name__}")
+    date = row.get("date") or None
+    try:
+        date = datetime.date.fromisoformat(str(date)) if date else content.default_date()
+    except ValueError:
+        raise ValueError(f"bad date {date!r} (expected YYYY-MM-DD)") from None
+    return (
+        row.get("sender") or content.DEFAULT_SENDER,
+        row.get("recipient") or content.DEFAULT_RECIPIENT,
+        row.get("accent") or content.DEFAULT_ACCENT,
+        date,
+    )
+
+
+class SkippedRows:
+    """How many rows failed validation, with (row number, reason) for the first `keep` of them."""
+
+    def __init__(self, keep: int = MAX_REPORTED):
+        self.keep = keep
+        self.count = 0
+        self.first = []
+
+    def add(self, n: int, reason: str):
+        self.count += 1
+        if len(self.first) < self.keep:
+            self.first.append((n, reason))
+
+
+def valid_rows(rows, skipped: SkippedRows):
+    """Yield (row number, row) for rows that normalize; the rest are recorded in `skipped`."""
+    for n, row in enumerate(rows):
+        try:
+            normalize_row(row)
+        except ValueError as e:
+            skipped.add(n, str(e))
+            continue
+        yield n, row
+
+
+def batches(numbered_rows, size: int):
+    batch = []
+    for n, row in numbered_rows:
+        batch.append((n, row))
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# -----------------------
+# Rendering (runs in worker processes)
+# -----------------------
+def slug(text: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_-]+", "-", text).strip("-")[:40] or "recipient"
+
+
+def render_bundle(n: int, row: dict, out_dir: Path, stages_dir: Path = STAGES_DIR, character_img: str = None) -> Path:
+    if character_img is None:
+        character_img = picture_html("IDK.jpg", 120, "character")
+    sender, recipient, accent, date = normalize_row(row)
+    dtstart = content.event_start(date)
+    bundle = out_dir / f"{n:06d}-{slug(recipient)}"
+    bundle.mkdir(parents=True, exist_ok=True)
+    vendor.copy_assets(bundle / "vendor")
+
+    ics_name = "valentine.ics"
+    (bundle / ics_name).write_text(build_ics(*content.event_details(sender, recipient), dtstart), encoding="utf-8")
+    mapping = content.stage_mapping(
+        sender, recipient, accent, dtstart,
+        ics_uri=ics_name,
+        character_img=character_img,
+    )
+    files = []
+    for name in content.STAGES:
+        html = inject(load_stage_template(name, stages_dir), {**mapping, **vendor.asset_mapping(name, "vendor")})
+        (bundle / f"{name}.html").write_text(html, encoding="utf-8")
+        files.append(f"{name}.html")
+    index = INDEX_HTML.replace("STAGE_FILES_JSON", json.dumps(files)).replace("STAGE_FILES_0", files[0])
+    (bundle / "index.html").write_text(index, encoding="utf-8")
+    return bundle
+
+
+def render_batch(batch: list, out_dir: Path, stages_dir: Path, character_img: str) -> int:
+    for n, row in batch:
+        render_bundle(n, row, out_dir, stages_dir, character_img)
+    return len(batch)
+
+
+# -----------------------
+# Driver
+# -----------------------
+def export(rows, out_dir: Path, jobs: int = None, batch_size: int = 64, stages_dir: Path = STAGES_DIR,
+           progress=None, skipped: SkippedRows = None) -> int:
+    """Render every row in `rows` into `out_dir`; returns the number of bundles written.
+
+    At most `2 * jobs` batches are in flight at a time, so memory stays flat
+    regardless of how many rows there are. Rows that don't validate are
+    skipped; pass a SkippedRows as `skipped` to find out which.
+    """
+    skipped = SkippedRows() if skipped is None else skipped
+    out_dir.mkdir(parents=True, exist_ok=True)
+    jobs = jobs or os.cpu_count() or 1
+    # built once here: workers building the image variants themselves would race on assets/.cache/
+    character_img = picture_html("IDK.jpg", 120, "character")
+    done = 0
+    with cf.ProcessPoolExecutor(max_workers=jobs) as pool:
+        pending = set()
+        for batch in batches(valid_rows(rows, skipped), batch_size):
+            if len(pending) >= 2 * jobs:
+                finished, pending = cf.wait(pending, return_when=cf.FIRST_COMPLETED)
+                for fut in finished:
+                    done += fut.result()
+                if progress:
+                    progress(done)
+            pending.add(pool.submit(render_batch, batch, out_dir, stages_dir, character_img))
+        for fut in cf.as_completed(pending):
+            done += fut.result()
+    return done
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m heist.export", description=__doc__.split("\n\n")[0])
+    parser.add_argument("rows", type=Path, help="CSV or JSONL with sender, recipient, accent, date (YYYY-MM-DD) columns")
+    parser.add_argument("-o", "--out", type=Path, default=Path("dist"), help="output directory (default: dist/)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=64, help="rows per task sent to a worker")
+    parser.add_argument("--stages-dir", type=Path, default=STAGES_DIR)
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+
+    def progress(done):
+        elapsed = time.perf_counter() - started
+        print(f"\r{done} bundles, {done / elapsed:.1f} bundles/sec", end="", file=sys.stderr)
+
+    skipped = SkippedRows()
+    total = export(read_rows(args.rows), args.out, args.jobs, args.batch_size, args.stages_dir, progress, skipped)
+    elapsed = time.perf_counter() - started
+    rate = total / elapsed if elapsed else 0.0
+    print(f"\rwrote {total} bundles to {args.out} in {elapsed:.2f}s ({rate:.1f} bundles/sec)", file=sys.stderr)
+    if skipped.count:
+        print(f"skipped {skipped.count} bad rows:", file=sys.stderr)
+        for n, reason in skipped.first:
+            # numbered like the bundles (0-based, header line not counted)
+            print(f"  row {n}: {reason}", file=sys.stderr)
+        if skipped.count > len(skipped.first):
+            print(f"  ... and {skipped.count - len(skipped.first)} more", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
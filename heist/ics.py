@@ -0,0 +1,50 @@
+# heist/ics.py
+"""
+Calendar invite for the finale.
+
+Everything in the generated file is derived from the event inputs (no
+`datetime.now()`), so the same inputs always give byte-identical output and
+the finale HTML stays stable between reruns. Results are memoized.
+"""
+import base64
+import datetime
+import functools
+import hashlib
+import textwrap
+
+
+def event_uid(title, description, dtstart, duration_minutes, location) -> str:
+    digest = hashlib.sha1(
+        "\x1f".join([title, description, dtstart.isoformat(), str(duration_minutes), location]).encode("utf-8")
+    ).hexdigest()
+    return f"heartheist-{digest[:16]}@meow"
+
+
+@functools.lru_cache(maxsize=256)
+def build_ics(title, description, dtstart, duration_minutes=120, location="To Be Announced") -> str:
+    dtend = dtstart + datetime.timedelta(minutes=duration_minutes)
+    uid = event_uid(title, description, dtstart, duration_minutes, location)
+    # stamp the invite at midnight UTC of the event day rather than "now"
+    dtstamp = dtstart.strftime("%Y%m%dT000000Z")
+    return textwrap.dedent(f"""\
+    BEGIN:VCALENDAR
+    VERSION:2.0
+    PRODID:-//HeartHeist//EN
+    BEGIN:VEVENT
+    UID:{uid}
+    DTSTAMP:{dtstamp}
+    DTSTART:{dtstart.strftime('%Y%m%dT%H%M00')}
+    DTEND:{dtend.strftime('%Y%m%dT%H%M00')}
+    SUMMARY:{title}
+    LOCATION:{location}
+    DESCRIPTION:{description}
+    END:VEVENT
+    END:VCALENDAR
+    """)
+
+
+@functools.lru_cache(maxsize=256)
+def make_ics_data_uri(title, description, dtstart, duration_minutes=120, location="To Be Announced"):
+    ics = build_ics(title, description, dtstart, duration_minutes, location)
+    b64 = base64.b64encode(ics.encode("utf-8")).decode("utf-8")
+    return f"data:text/calendar;base64,{b64}", ics
@@ -0,0 +1,114 @@
+# heist/images.py
+"""
+Right-sized variants of images in `assets/`.
+
+Variants (1x/2x, WebP and JPEG) are produced once with Pillow and cached on
+disk under `assets/.cache/`, named by a hash of the source bytes so an edited
+source gets fresh variants. `picture_html()` turns them into a `<picture>`
+element for the `{{CHARACTER_IMG}}` placeholder, either inlined as data URIs
+or pointing at files served from `url_prefix`.
+"""
+import base64
+import functools
+import hashlib
+import html
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+from PIL import Image, ImageOps
+
+ASSETS_DIR = Path(__file__).resolve().parent.parent / "assets"
+CACHE_DIR = ASSETS_DIR / ".cache"
+
+FORMATS = {
+    # extension: (Pillow format, save options, mime type)
+    "webp": ("WEBP", {"quality": 80, "method": 6}, "image/webp"),
+    "jpg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}, "image/jpeg"),
+}
+
+_lock = threading.Lock()
+
+
+def content_hash(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()[:12]
+
+
+def build_variants(src: Path, size: int, scales=(1, 2), cache_dir: Path = CACHE_DIR) -> dict:
+    """Return {(scale, ext): path} of square variants of `src` at `size` CSS pixels.
+
+    Variants already on disk for the same source content are reused.
+    """
+    digest = content_hash(src)
+    wanted = {
+        (scale, ext): cache_dir / f"{src.stem}-{digest}-{size * scale}.{ext}"
+        for scale in scales
+        for ext in FORMATS
+    }
+    if all(p.exists() for p in wanted.values()):
+        return wanted
+    # _lock keeps threads in this process from doing the same work twice
+    with _lock:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        with Image.open(src) as im:
+            im = im.convert("RGB")
+            for (scale, ext), path in wanted.items():
+                if path.exists():
+                    continue
+                px = size * scale
+                variant = ImageOps.fit(im, (px, px), Image.LANCZOS)
+                fmt, options, _ = FORMATS[ext]
+                # write then rename so concurrent readers never see half a file; the
+                # temp name is unique because other processes (the exporter's
+                # workers) may be building the same variant at the same time
+                with tempfile.NamedTemporaryFile(dir=cache_dir, suffix=f".{ext}.tmp", delete=False) as tmp:
+                    variant.save(tmp, fmt, **options)
+                try:
+                    os.replace(tmp.name, path)
+                except OSError:
+                    os.unlink(tmp.name)
+                    # another process got there first
+                    if not path.exists():
+                        raise
+    return wanted
+
+
+def data_uri(path: Path) -> str:
+    mime = FORMATS[path.suffix.lstrip(".")][2]
+    return f"data:{mime};base64,{base64.b64encode(path.read_bytes()).decode('ascii')}"
+
+
+def _picture(variants: dict, size: int, alt: str, url) -> str:
+    scales = sorted({scale for scale, _ in variants})
+    webp = ", ".join(f"{url(variants[(s, 'webp')])} {s}x" for s in scales)
+    jpg = ", ".join(f"{url(variants[(s, 'jpg')])} {s}x" for s in scales)
+    return (
+        f'<picture><source type="image/webp" srcset="{webp}">'
+        f'<img src="{url(variants[(1, "jpg")])}" srcset="{jpg}" width="{size}" height="{size}" '
+        f'alt="{html.escape(alt)}" decoding="async"></picture>'
+    )
+
+
+@functools.lru_cache(maxsize=32)
+def _picture_cached(src: str, mtime: int, size: int, alt: str, url_prefix):
+    variants = build_variants(Path(src), size)
+    if url_prefix is None:
+        # every inlined variant is paid for on every view, so inline just the
+        # 2x WebP (sharp everywhere) and a 1x JPEG for browsers without WebP
+        return (
+            f'<picture><source type="image/webp" srcset="{data_uri(variants[(2, "webp")])}">'
+            f'<img src="{data_uri(variants[(1, "jpg")])}" width="{size}" height="{size}" '
+            f'alt="{html.escape(alt)}" decoding="async"></picture>'
+        )
+    return _picture(variants, size, alt, lambda p: f"{url_prefix.rstrip('/')}/{p.name}")
+
+
+def picture_html(name: str, size: int, alt: str = "", url_prefix=None, assets_dir: Path = ASSETS_DIR) -> str:
+    """`<picture>` markup for `assets/<name>` displayed at `size` CSS pixels.
+
+    With `url_prefix=None` the variants are inlined as data URIs; otherwise
+    each is referenced as `<url_prefix>/<variant file name>`.
+    """
+    src = assets_dir / name
+    return _picture_cached(str(src), src.stat().st_mtime_ns, size, alt, url_prefix)
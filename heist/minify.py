@@ -0,0 +1,159 @@
+# heist/minify.py
+"""
+Minified, precompressed stage payloads with a per-stage size budget.
+
+`minify_html()` is deliberately conservative: it drops HTML and CSS
+comments, collapses CSS whitespace, strips indentation, blank lines and
+whole-line `//` comments from scripts (newlines are kept so automatic
+semicolon insertion still works), and removes whitespace-only lines between
+tags. `{{PLACEHOLDERS}}` pass through untouched.
+
+    python -m heist.minify            # build/stages/*.html(.gz) + size report
+    python -m heist.minify --budget rain=16000
+
+The report also lists each stage's placeholders that have no value and the
+mapping keys no stage uses. Exits with status 1 when a stage's gzipped size
+is over its budget.
+"""
+import argparse
+import gzip
+import hashlib
+import re
+import sys
+from pathlib import Path
+
+BUILD_DIR = Path(__file__).resolve().parent.parent / "build" / "stages"
+
+# gzipped bytes per stage as rendered with the default inputs
+BUDGETS = {
+    "vault": 2500,
+    "puzzle": 2500,
+    "rain": 14000,
+    "finale": 3000,
+}
+
+_BLOCK_RE = re.compile(r"(<(style|script)\b[^>]*>)(.*?)(</\2>)", re.S | re.I)
+_HTML_COMMENT_RE = re.compile(r"<!--(?!\[if).*?-->", re.S)
+_CSS_COMMENT_RE = re.compile(r"/\*.*?\*/", re.S)
+
+
+def minify_css(css: str) -> str:
+    css = _CSS_COMMENT_RE.sub("", css)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    css = re.sub(r":\s+", ":", css)
+    return css.replace(";}", "}").strip()
+
+
+def minify_js(js: str) -> str:
+    lines = []
+    for line in js.splitlines():
+        line = line.strip()
+        if line and not line.startswith("//"):
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def _minify_markup(markup: str) -> str:
+    markup = _HTML_COMMENT_RE.sub("", markup)
+    markup = re.sub(r">\s*\n\s*<", "><", markup)
+    return re.sub(r"\n\s+", "\n", markup)
+
+
+def minify_html(text: str) -> str:
+    out = []
+    pos = 0
+    for m in _BLOCK_RE.finditer(text):
+        out.append(_minify_markup(text[pos:m.start()]))
+        body = minify_css(m.group(3)) if m.group(2).lower() == "style" else minify_js(m.group(3))
+        out.append(m.group(1) + body + m.group(4))
+        pos = m.end()
+    out.append(_minify_markup(text[pos:]))
+    return "".join(out).strip() + "\n"
+
+
+# -----------------------
+# Build step: build/stages/<name>.html and .html.gz, rebuilt when the source changes
+# -----------------------
+def build_stage(src: Path, build_dir: Path = BUILD_DIR) -> Path:
+    """Write the minified and gzipped copies of `src`; skipped when they are up to date."""
+    raw = src.read_bytes()
+    digest = hashlib.sha256(raw).hexdigest()
+    out = build_dir / src.name
+    stamp = build_dir / f"{src.name}.sha256"
+    if out.exists() and stamp.exists() and stamp.read_text() == digest:
+        return out
+    build_dir.mkdir(parents=True, exist_ok=True)
+    minified = minify_html(raw.decode("utf-8")).encode("utf-8")
+    out.write_bytes(minified)
+    # mtime=0 keeps the .gz byte-identical between builds
+    (build_dir / f"{src.name}.gz").write_bytes(gzip.compress(minified, 9, mtime=0))
+    stamp.write_text(digest)
+    return out
+
+
+def sizes(html: str) -> dict:
+    raw = html.encode("utf-8")
+    minified = minify_html(html).encode("utf-8")
+    return {"raw": len(raw), "minified": len(minified), "gzip": len(gzip.compress(minified, 9, mtime=0))}
+
+
+def default_templates(stages_dir: Path) -> dict:
+    """{stage: (unminified CompiledTemplate, mapping with the app's default inputs)}."""
+    from heist import content, vendor
+    from heist.images import picture_html
+    from heist.templates import CompiledTemplate
+
+    dtstart = content.event_start(content.default_date())
+    mapping = content.stage_mapping(
+        content.DEFAULT_SENDER, content.DEFAULT_RECIPIENT, content.DEFAULT_ACCENT, dtstart,
+        character_img=picture_html("IDK.jpg", 120, "character"),
+    )
+    return {
+        name: (CompiledTemplate((stages_dir / f"{name}.html").read_text(encoding="utf-8")),
+               {**mapping, **vendor.asset_mapping(name)})
+        for name in content.STAGES
+    }
+
+
+
+def main(argv=None) -> int:
+    from heist.templates import STAGES_DIR
+
+    parser = argparse.ArgumentParser(prog="python -m heist.minify", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--stages-dir", type=Path, default=STAGES_DIR)
+    parser.add_argument("--build-dir", type=Path, default=BUILD_DIR)
+    parser.add_argument("--budget", action="append", default=[], metavar="STAGE=BYTES",
+                        help="override the gzipped-size budget of a stage (repeatable)")
+    args = parser.parse_args(argv)
+
+    budgets = dict(BUDGETS)
+    for item in args.budget:
+        name, _, value = item.partition("=")
+        budgets[name] = int(value)
+
+    over = []
+    unused = None
+    print(f"{'stage':<8} {'raw':>8} {'minified':>9} {'gzip':>7} {'budget':>7}  no value for")
+    for name, (template, mapping) in default_templates(args.stages_dir).items():
+        build_stage(args.stages_dir / f"{name}.html", args.build_dir)
+        s = sizes(template.render(mapping))
+        budget = budgets.get(name)
+        flag = ""
+        if budget is not None and s["gzip"] > budget:
+            over.append(name)
+            flag = "  OVER"
+        # every stage gets the same keys, so only those no stage references count as unused
+        unused = template.unused(mapping) if unused is None else unused & template.unused(mapping)
+        print(f"{name:<8} {s['raw']:>8} {s['minified']:>9} {s['gzip']:>7} {budget if budget is not None else '-':>7}"
+              f"  {', '.join(sorted(template.unknown(mapping))) or '-'}{flag}")
+    if unused:
+        print(f"mapping keys no stage uses: {', '.join(sorted(unused))}")
+    if over:
+        print(f"over budget: {', '.join(over)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+# heist/render_cache.py
+"""
+Process-wide LRU cache of rendered stage HTML.
+
+Sessions with the same inputs (most keep the default sender/recipient/accent/
+date) share one rendered string instead of each building their own on every
+rerun. Entries are keyed by (stage, template version, mapping values) and
+evicted least-recently-used once the total size goes over `max_bytes`.
+`warm()` renders a stage on a background thread so the next rerun finds it.
+"""
+import concurrent.futures as cf
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from heist.templates import STAGES_DIR, load_stage_template
+
+logger = logging.getLogger(__name__)
+
+
+class RenderCache:
+    def __init__(self, max_bytes: int = 8 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        # a plain membership test: not counted as a hit or miss, LRU order untouched
+        with self._lock:
+            return key in self._entries
+
+    def get(self, key):
+        with self._lock:
+            html = self._entries.get(key)
+            if html is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return html
+
+    def put(self, key, html: str):
+        # sizes are counted in characters; close enough to bytes for a budget
+        nbytes = len(html)
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._entries[key] = html
+            self.size += nbytes
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+RENDER_CACHE = RenderCache()
+
+
+def cache_key(name: str, version, mapping: dict) -> tuple:
+    return (name, version, tuple(sorted((k, str(v)) for k, v in mapping.items())))
+
+
+def _prepare(name: str, mapping: dict, stages_dir: Path) -> tuple:
+    """(template, the part of `mapping` it uses, cache key) for stage `name`."""
+    template = load_stage_template(name, stages_dir)
+    # only the placeholders this stage uses can change its output
+    used = {k: v for k, v in mapping.items() if k in template.placeholders}
+    return template, used, cache_key(str(stages_dir / name), template.version, used)
+
+
+def render_stage(name: str, mapping: dict, stages_dir: Path = STAGES_DIR, cache: RenderCache = RENDER_CACHE) -> str:
+    """Render stage `name` with `mapping`, reusing a cached copy when the inputs match."""
+    template, used, key = _prepare(name, mapping, stages_dir)
+    html = cache.get(key)
+    if html is None:
+        html = template.render(used)
+        cache.put(key, html)
+    return html
+
+
+# -----------------------
+# Background warming
+# -----------------------
+_warmer = cf.ThreadPoolExecutor(max_workers=1, thread_name_prefix="heist-warm")
+_warming = set()
+_warming_lock = threading.Lock()
+
+
+def _warm(key, template, used, cache):
+    try:
+        cache.put(key, template.render(used))
+    except Exception:
+        # the rerun that needs this stage renders it itself and surfaces the error there
+        logger.debug("warming %s failed", key[0], exc_info=True)
+    finally:
+        with _warming_lock:
+            _warming.discard(key)
+
+
+def warm(name: str, mapping: dict, stages_dir: Path = STAGES_DIR, cache: RenderCache = RENDER_CACHE):
+    """Render stage `name` in the background unless it is cached or already being rendered.
+
+    Doesn't touch the cache's hit/miss counters.
+    """
+    try:
+        template, used, key = _prepare(name, mapping, stages_dir)
+    except FileNotFoundError:
+        return  # the rerun that shows this stage provisions it and reports the error
+    if key in cache:
+        return
+    with _warming_lock:
+        if key in _warming:
+            return
+        _warming.add(key)
+    _warmer.submit(_warm, key, template, used, cache)
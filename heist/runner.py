@@ -0,0 +1,30 @@
+# heist/runner.py
+"""
+Single-iframe stage runner.
+
+A bidirectional Streamlit component that receives every rendered stage
+once and moves between them in the browser. Stages report completion with
+`parent.postMessage({heist: "stage-complete", stage})`; the runner advances
+to the next stage itself and sends `{"epoch", "stage_idx", "completed"}`
+back with `setComponentValue`, so the server only records progress.
+
+`epoch` lets the server take control again (Restart, Jump, Skip): the runner
+only jumps to `start` when it sees a new epoch, and values tagged with an
+older epoch should be ignored.
+"""
+from pathlib import Path
+
+import streamlit.components.v1 as components
+
+_component = components.declare_component(
+    "heist_stage_runner",
+    path=str(Path(__file__).resolve().parent / "runner_frontend"),
+)
+
+
+def stage_runner(stages: list, html: list, start: int, epoch: int, height: int = 720, key: str = "stage_runner"):
+    """Show the stage sequence starting at `start`; returns the last progress value or None."""
+    # tuples serialize the same, but Streamlit checks list args for dataframes,
+    # and that check imports pandas (~450 ms on the first call in a process)
+    return _component(stages=tuple(stages), html=tuple(html), start=start, epoch=epoch,
+                      height=height, key=key, default=None)
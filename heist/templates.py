@@ -0,0 +1,96 @@
+# heist/templates.py
+"""
+Compiled stage templates.
+
+Each `stages/*.html` file is parsed once into static chunks and `{{NAME}}`
+slots, cached process-wide by (path, mtime), and rendered with a single join.
+Templates are minified before compiling unless HEIST_MINIFY=0.
+"""
+import os
+import re
+import threading
+from pathlib import Path
+
+from heist.minify import minify_html
+
+MINIFY = os.environ.get("HEIST_MINIFY", "1") != "0"
+
+STAGES_DIR = Path(__file__).resolve().parent.parent / "stages"
+
+PLACEHOLDER_RE = re.compile(r"\{\{[A-Z0-9_]+\}\}")
+
+
+class CompiledTemplate:
+    """A template split into static chunks around its placeholder slots."""
+
+    __slots__ = ("chunks", "slots", "placeholders", "version")
+
+    def __init__(self, text: str, version=0):
+        self.chunks = []
+        self.slots = []
+        pos = 0
+        for m in PLACEHOLDER_RE.finditer(text):
+            self.chunks.append(text[pos:m.start()])
+            self.slots.append(m.group(0))
+            pos = m.end()
+        self.chunks.append(text[pos:])
+        self.placeholders = frozenset(self.slots)
+        self.version = version
+
+    def render(self, mapping: dict) -> str:
+        # unknown placeholders are left in place, like the old str.replace pass
+        parts = [self.chunks[0]]
+        for slot, chunk in zip(self.slots, self.chunks[1:]):
+            parts.append(mapping.get(slot, slot))
+            parts.append(chunk)
+        return "".join(parts)
+
+    def unknown(self, mapping: dict) -> set:
+        """Placeholders used by the template that `mapping` has no value for."""
+        return set(self.placeholders.difference(mapping))
+
+    def unused(self, mapping: dict) -> set:
+        """Keys of `mapping` that the template never references."""
+        return set(mapping).difference(self.placeholders)
+
+
+# -----------------------
+# Process-wide cache: path -> (mtime_ns, CompiledTemplate)
+# -----------------------
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def compile_file(path: Path) -> CompiledTemplate:
+    """Return the compiled template for `path`, recompiling only when its mtime changes."""
+    key = str(path)
+    try:
+        mtime = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Stage template not found: {path}") from None
+    hit = _cache.get(key)
+    if hit is not None and hit[0] == mtime:
+        return hit[1]
+    text = path.read_text(encoding="utf-8")
+    if MINIFY:
+        text = minify_html(text)
+    compiled = CompiledTemplate(text, version=mtime)
+    with _cache_lock:
+        _cache[key] = (mtime, compiled)
+    return compiled
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
+
+
+def load_stage_template(name: str, stages_dir: Path = STAGES_DIR) -> CompiledTemplate:
+    return compile_file(stages_dir / f"{name}.html")
+
+
+def inject(template, mapping: dict) -> str:
+    """Render `template` (compiled or plain text) with `mapping` in one pass."""
+    if not isinstance(template, CompiledTemplate):
+        template = CompiledTemplate(template)
+    return template.render(mapping)
@@ -0,0 +1,125 @@
+# heist/tracing.py
+"""
+Per-rerun timing spans for app.py.
+
+Switched on with HEIST_TRACE=1. Each rerun is tagged (stage, trigger) and
+every phase wrapped in `span(name)` is timed; at the end of the rerun the
+spans are appended to a rotating JSONL file (HEIST_TRACE_FILE, default
+`traces/spans.jsonl`) and folded into process-wide p50/p95 windows for the
+sidebar perf panel.
+
+When tracing is off, `span()` hands back one shared no-op context manager
+and the other calls return immediately, so it can stay wired in production.
+"""
+import contextlib
+import json
+import logging
+import logging.handlers
+import os
+import statistics
+import threading
+import time
+import uuid
+from collections import deque
+from pathlib import Path
+
+ENABLED = os.environ.get("HEIST_TRACE", "0") == "1"
+TRACE_FILE = Path(os.environ.get("HEIST_TRACE_FILE", Path(__file__).resolve().parent.parent / "traces" / "spans.jsonl"))
+MAX_BYTES = 5 * 1024 * 1024
+BACKUP_COUNT = 3
+WINDOW = 1000  # most recent samples kept per span for the percentiles
+
+_NOOP = contextlib.nullcontext()
+_local = threading.local()  # Streamlit runs each session's script on its own thread
+_windows = {}
+_windows_lock = threading.Lock()
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def _get_writer() -> logging.Logger:
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                TRACE_FILE.parent.mkdir(parents=True, exist_ok=True)
+                handler = logging.handlers.RotatingFileHandler(
+                    TRACE_FILE, maxBytes=MAX_BYTES, backupCount=BACKUP_COUNT, encoding="utf-8"
+                )
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                writer = logging.getLogger("heist.tracing.spans")
+                writer.setLevel(logging.INFO)
+                writer.propagate = False
+                writer.addHandler(handler)
+                _writer = writer
+    return _writer
+
+
+class _Span:
+    __slots__ = ("rerun", "name", "t0")
+
+    def __init__(self, rerun, name):
+        self.rerun = rerun
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.rerun["spans"].append((self.name, (time.perf_counter() - self.t0) * 1000))
+        return False
+
+
+def start_rerun(**tags):
+    """Begin tracing the current rerun (no-op when tracing is off)."""
+    if not ENABLED:
+        return
+    _local.rerun = {"id": uuid.uuid4().hex[:12], "ts": time.time(), "t0": time.perf_counter(), "tags": tags, "spans": []}
+
+
+def tag(**tags):
+    rerun = getattr(_local, "rerun", None) if ENABLED else None
+    if rerun is not None:
+        rerun["tags"].update(tags)
+
+
+def span(name: str):
+    """Context manager timing one phase of the current rerun."""
+    if not ENABLED:
+        return _NOOP
+    rerun = getattr(_local, "rerun", None)
+    if rerun is None:
+        return _NOOP
+    return _Span(rerun, name)
+
+
+def end_rerun():
+    """Finish the current rerun: record its spans plus a `script` total."""
+    if not ENABLED:
+        return
+    rerun = getattr(_local, "rerun", None)
+    if rerun is None:
+        return
+    _local.rerun = None
+    spans = rerun["spans"] + [("script", (time.perf_counter() - rerun["t0"]) * 1000)]
+    with _windows_lock:
+        for name, ms in spans:
+            _windows.setdefault(name, deque(maxlen=WINDOW)).append(ms)
+    writer = _get_writer()
+    for name, ms in spans:
+        writer.info(json.dumps({"ts": rerun["ts"], "rerun": rerun["id"], **rerun["tags"], "span": name, "ms": round(ms, 3)}))
+
+
+def percentiles() -> dict:
+    """{span name: {"p50", "p95", "n"}} over the most recent samples, in ms."""
+    with _windows_lock:
+        windows = {name: sorted(samples) for name, samples in _windows.items()}
+    out = {}
+    for name, samples in windows.items():
+        out[name] = {
+            "p50": statistics.median(samples),
+            "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+            "n": len(samples),
+        }
+    return out
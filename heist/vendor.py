@@ -0,0 +1,176 @@
+# heist/vendor.py
+"""
+Registry of the third-party assets the stages use, vendored under
+`static/vendor/` so nothing is fetched from a CDN while someone is playing.
+
+Streamlit serves `static/` at `<baseUrlPath>/app/static/` (enabled in
+`.streamlit/config.toml`). That route can't set Cache-Control, only
+ETag/Last-Modified, so URLs carry a `?v=<content hash>` and change whenever
+the file does.
+
+    python -m heist.vendor           # list assets and where each is served from
+    python -m heist.vendor fetch     # download missing upstream copies
+
+Every download is checked against the `sha256` pinned for it in ASSETS and
+is not written when it doesn't match; an asset with no pin is not fetched
+at all. An asset that hasn't been fetched yet is served from its first-party
+`fallback` when it has one, and from its upstream URL otherwise.
+"""
+import argparse
+import functools
+import hashlib
+import shutil
+import sys
+import urllib.request
+from pathlib import Path
+
+from heist import content
+
+STATIC_DIR = Path(__file__).resolve().parent.parent / "static"
+VENDOR_DIR = STATIC_DIR / "vendor"
+
+ASSETS = {
+    "canvas-confetti": {
+        # the file as published in the npm package; jsDelivr's on-the-fly .min.js can change bytes
+        "url": "https://cdn.jsdelivr.net/npm/canvas-confetti@1.5.1/dist/confetti.browser.js",
+        "file": "canvas-confetti-1.5.1.js",
+        # not pinned yet: take it from a copy checked against the npm package, e.g.
+        #   npm pack canvas-confetti@1.5.1 && tar -xOf canvas-confetti-1.5.1.tgz package/dist/confetti.browser.js | sha256sum
+        "sha256": None,
+        # same confetti({particleCount, spread, origin}) call, no network needed
+        "fallback": "confetti-lite.js",
+    },
+    "lofi-audio": {
+        "url": content.AUDIO_URL,
+        "file": "lofi-chill-beats.mp3",
+        "sha256": None,
+        "fallback": None,
+    },
+}
+
+# what each stage loads, so the stage before it can prefetch it
+STAGE_ASSETS = {
+    "finale": ["canvas-confetti"],
+}
+
+
+# -----------------------
+# Lookup
+# -----------------------
+def local_file(name: str, vendor_dir: Path = VENDOR_DIR):
+    """The vendored copy of asset `name`, else its fallback, else None."""
+    asset = ASSETS[name]
+    for filename in (asset["file"], asset["fallback"]):
+        if filename and (vendor_dir / filename).exists():
+            return vendor_dir / filename
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def _content_hash(path: Path, mtime_ns: int) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()[:10]
+
+
+def asset_url(name: str, base: str = "/app/static/vendor", vendor_dir: Path = VENDOR_DIR) -> str:
+    path = local_file(name, vendor_dir)
+    if path is None:
+        return ASSETS[name]["url"]
+    return f"{base}/{path.name}?v={_content_hash(path, path.stat().st_mtime_ns)}"
+
+
+def static_base(base_url_path: str = "") -> str:
+    """URL prefix of the vendored files for a server with `server.baseUrlPath` set."""
+    base_url_path = base_url_path.strip("/")
+    return f"/{base_url_path}/app/static/vendor" if base_url_path else "/app/static/vendor"
+
+
+def prefetch_tags(stage: str, base: str = "/app/static/vendor", vendor_dir: Path = VENDOR_DIR) -> str:
+    """<link rel="prefetch"> for the assets of the stage after `stage`."""
+    idx = content.STAGES.index(stage)
+    if idx + 1 >= len(content.STAGES):
+        return ""
+    names = STAGE_ASSETS.get(content.STAGES[idx + 1], [])
+    return "".join(f'<link rel="prefetch" href="{asset_url(n, base, vendor_dir)}">' for n in names)
+
+
+def asset_mapping(stage: str, base: str = "/app/static/vendor", vendor_dir: Path = VENDOR_DIR) -> dict:
+    """Placeholders for the vendored assets, as seen from stage `stage`."""
+    return {
+        "{{AUDIO_URL}}": asset_url("lofi-audio", base, vendor_dir),
+        "{{CONFETTI_JS}}": asset_url("canvas-confetti", base, vendor_dir),
+        "{{PREFETCH_NEXT}}": prefetch_tags(stage, base, vendor_dir),
+    }
+
+
+def copy_assets(dest: Path, vendor_dir: Path = VENDOR_DIR):
+    """Copy every locally available asset into `dest` (for static bundles)."""
+    dest.mkdir(parents=True, exist_ok=True)
+    for name in ASSETS:
+        path = local_file(name, vendor_dir)
+        if path is not None and not (dest / path.name).exists():
+            shutil.copyfile(path, dest / path.name)
+
+
+# -----------------------
+# Fetching
+# -----------------------
+class IntegrityError(ValueError):
+    """A download has no pinned sha256, or doesn't match it."""
+
+
+def fetch(names=None, vendor_dir: Path = VENDOR_DIR, force: bool = False) -> list:
+    """Download the upstream copy of each asset that isn't vendored yet; returns the paths written.
+
+    Raises IntegrityError, before anything is written, for an asset without a
+    pinned sha256 or a download that doesn't match it.
+    """
+    vendor_dir.mkdir(parents=True, exist_ok=True)
+    written = []
+    for name in names or ASSETS:
+        asset = ASSETS[name]
+        path = vendor_dir / asset["file"]
+        if path.exists() and not force:
+            continue
+        if not asset.get("sha256"):
+            raise IntegrityError(f"no sha256 pinned for {name} in heist/vendor.py ASSETS")
+        with urllib.request.urlopen(asset["url"], timeout=30) as resp:
+            data = resp.read()
+        digest = hashlib.sha256(data).hexdigest()
+        if digest != asset["sha256"]:
+            raise IntegrityError(f"sha256 mismatch for {asset['url']}: expected {asset['sha256']}, got {digest}")
+        tmp = path.with_suffix(path.suffix + ".part")
+        tmp.write_bytes(data)
+        tmp.replace(path)
+        written.append(path)
+    return written
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m heist.vendor", description=__doc__.split("\n\n")[0])
+    parser.add_argument("command", nargs="?", choices=["list", "fetch"], default="list")
+    parser.add_argument("names", nargs="*", help="assets to fetch (default: all)")
+    parser.add_argument("--force", action="store_true", help="download again even if already vendored")
+    args = parser.parse_args(argv)
+
+    if args.command == "fetch":
+        failed = False
+        for name in args.names or ASSETS:
+            try:
+                for path in fetch([name], force=args.force):
+                    print(f"{name}: {path} (sha256 verified)")
+            except IntegrityError as e:
+                failed = True
+                print(f"{name}: refusing to vendor: {e}", file=sys.stderr)
+            except OSError as e:
+                failed = True
+                print(f"{name}: could not fetch {ASSETS[name]['url']}: {e}", file=sys.stderr)
+        return 1 if failed else 0
+
+    for name in ASSETS:
+        path = local_file(name)
+        print(f"{name:<16} {path.name if path else '-':<32} {asset_url(name)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())